@@ -5,20 +5,42 @@ dos endereços em uma planilha Excel.
 
 Fluxo:
     1. Lê CEPs de um arquivo Excel via 'return_ceps_in_file'.
-    2. Consulta cada CEP na API ViaCEP via 'get_address_cep'.
+    2. Consulta os CEPs de forma concorrente na API ViaCEP via 'fetch_addresses'.
     3. Salva os endereços encontrados em outro arquivo via 'save_address_in_excel'.
 """
 
-import http.client
-import json
+import asyncio
 import os
 import re
+import shelve
+import time
+from operator import itemgetter
 from pathlib import Path
+import aiohttp
+import lxml  # noqa: F401 — openpyxl usa o lxml (C) para ler/gravar o XML quando instalado
 from openpyxl import Workbook, load_workbook
 
+try:
+    # orjson é opcional: decodifica os bytes da resposta direto e é mais rápido que o json padrão
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
 DIR = Path(__file__).parent
 FILE_ADDRESS = DIR / "Address.xlsx"
 FILE_CEPS = DIR / "CEPS.xlsx"
+VIACEP_URL = "https://viacep.com.br/ws/{cep}/json"
+
+# Máximo de requisições simultâneas à API ViaCEP
+MAX_CONCURRENT_REQUESTS = 10
+
+# Endereços já consultados ficam guardados em disco por 30 dias
+CACHE_FILE = DIR / ".api_cache"
+CACHE_TTL = 30 * 24 * 60 * 60
+
+# Expressões regulares compiladas uma única vez no carregamento do módulo
+CEP_REGEX = re.compile(r'\d{8}')
+NON_DIGIT_REGEX = re.compile(r'\D')
 
 COLUMNS = {
     "CEP":        "cep",
@@ -27,6 +49,10 @@ COLUMNS = {
     "Localidade": "localidade",
 }
 
+# Chaves da API resolvidas uma única vez; o itemgetter extrai todas em uma só chamada
+COLUMN_KEYS = tuple(COLUMNS.values())
+COLUMN_GETTER = itemgetter(*COLUMN_KEYS)
+
 
 def validate_cep(cep) -> bool:
     """
@@ -39,32 +65,64 @@ def validate_cep(cep) -> bool:
         bool: True Caso CEP for válido. False Caso CEP ser inválido.
 
     """
-    return bool(re.fullmatch(r'\d{8}', cep))
+    return bool(CEP_REGEX.fullmatch(cep))
+
+def read_cached_address(cache: shelve.Shelf, cep: str) -> dict[str, str] | None:
+    """
+    Busca no cache o endereço de um CEP consultado nos últimos 30 dias.
+
+    Args:
+        cache (shelve.Shelf): Cache de endereços aberto em 'fetch_addresses'.
+        cep (str): CEP somente com números.
+
+    Returns:
+        dict[str, str] | None: Endereço guardado, ou None se ainda não foi consultado ou expirou.
+    """
+    entry = cache.get(cep)
+    if entry and time.time() - entry["saved_at"] < CACHE_TTL:
+        return entry["data"]
+    return None
+
+
+def cache_address(cache: shelve.Shelf, cep: str, address: dict[str, str]) -> None:
+    """
+    Guarda o endereço retornado pela ViaCEP, com o horário da consulta.
 
-def get_address_cep(cep: str) -> dict[str, str]:
+    Args:
+        cache (shelve.Shelf): Cache de endereços aberto em 'fetch_addresses'.
+        cep (str): CEP somente com números.
+        address (dict[str, str]): Endereço retornado pela API.
+    """
+    cache[cep] = {"saved_at": time.time(), "data": address}
+
+
+async def get_address_cep(
+    cep: str,
+    session: aiohttp.ClientSession,
+    semaphore: asyncio.Semaphore,
+) -> dict[str, str]:
     """
     Consulta a API ViaCEP e retorna os dados de endereço do CEP informado.
 
     Args:
         cep (str): CEP a ser consultado, somente números (ex: '01001000').
+        session (aiohttp.ClientSession): Sessão HTTP compartilhada entre as consultas.
+        semaphore (asyncio.Semaphore): Limita o número de requisições simultâneas.
 
     Returns:
         dict[str, str]: Dicionário com os dados do endereço se encontrado.
         dict vazio: Se o CEP for inválido ou ocorrer erro na requisição.
     """
 
-      if not validate_cep(cep):
+    if not validate_cep(cep):
         print(f"CEP {cep} inválido (deve ter 8 dígitos).")
         return {}
-    
-    connection = http.client.HTTPSConnection("viacep.com.br")
-    try:
-        # Envia requisição GET para a API ViaCEP com o CEP informado
-        connection.request("GET", f"/ws/{cep}/json")
-        response = connection.getresponse()
 
-        # Decodifica a resposta JSON em UTF-8
-        address = json.loads(response.read().decode("utf-8"))
+    try:
+        async with semaphore:
+            # Envia requisição GET para a API ViaCEP com o CEP informado
+            async with session.get(VIACEP_URL.format(cep=cep)) as response:
+                address = json_loads(await response.read())
 
         # A API retorna {"erro": true} quando o CEP não existe
         if "erro" in address:
@@ -77,9 +135,37 @@ def get_address_cep(cep: str) -> dict[str, str]:
         print(f"Erro na requisição do CEP {cep}: {e}")
         return {}
 
-    finally:
-        # Garante o fechamento da conexão independente do resultado
-        connection.close()
+
+async def fetch_addresses(ceps: list[str]) -> list[dict[str, str]]:
+    """
+    Consulta todos os CEPs de forma concorrente, reaproveitando a mesma sessão HTTP.
+    Endereços consultados nos últimos 30 dias vêm do cache e não geram requisição.
+
+    Args:
+        ceps (list[str]): Lista de CEPs a serem consultados.
+
+    Returns:
+        list[dict[str, str]]: Endereços encontrados, na mesma ordem dos CEPs.
+    """
+    with shelve.open(str(CACHE_FILE)) as cache:
+        addresses = {cep: read_cached_address(cache, cep) for cep in ceps}
+        pending = [cep for cep, address in addresses.items() if address is None]
+
+        if pending:
+            semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+            connector = aiohttp.TCPConnector(limit=20, ttl_dns_cache=300)
+
+            async with aiohttp.ClientSession(connector=connector) as session:
+                results = await asyncio.gather(
+                    *(get_address_cep(cep, session, semaphore) for cep in pending)
+                )
+
+            for cep, address in zip(pending, results):
+                addresses[cep] = address
+                if address:
+                    cache_address(cache, cep, address)
+
+    return [addresses[cep] for cep in ceps if addresses[cep]]
 
 
 def return_ceps_in_file(file: Path) -> list[str]:
@@ -92,18 +178,23 @@ def return_ceps_in_file(file: Path) -> list[str]:
     Returns:
         list[str]: Lista de CEPs lidos a partir da segunda linha (ignora cabeçalho).
     """
-    wb = load_workbook(file)
+    # Modo somente leitura: lê as linhas sob demanda sem montar a planilha inteira
+    wb = load_workbook(file, read_only=True, data_only=True)
     ws = wb.active
     ceps = []
 
-    # Itera a partir da linha 2 para ignorar o cabeçalho
-    for row in ws.iter_rows(min_row=2, min_col=1, max_col=1):
-        for cell in row:
-            if cell.value:
+    try:
+        # Itera a partir da linha 2 para ignorar o cabeçalho
+        # values_only entrega os valores crus, sem criar um objeto Cell por célula
+        for (value,) in ws.iter_rows(min_row=2, min_col=1, max_col=1, values_only=True):
+            if value:
                 # Remove hífen para padronizar o formato do CEP
-                ceps_clear = re.sub(r'\D', '', str(cell.value))
+                ceps_clear = NON_DIGIT_REGEX.sub('', str(value))
                 if ceps_clear:
                     ceps.append(ceps_clear)
+    finally:
+        # O modo somente leitura mantém o arquivo aberto até o fechamento
+        wb.close()
 
     return ceps
 
@@ -119,21 +210,29 @@ def save_address_in_excel(addresses: list[dict[str, str]], file: Path) -> None:
         addresses (list[dict[str, str]]): Lista de endereços retornados pela API ViaCEP.
         file (str): Caminho do arquivo Excel de destino.
     """
-    # Cria arquivo novo com cabeçalho ou carrega o existente
     if os.path.exists(file):
+        # Carrega o existente, pois o modo somente escrita não permite reabrir arquivos
         wb = load_workbook(file)
         ws = wb.active
+
+        # Só adiciona o cabeçalho se a planilha estiver vazia. A1 é testada primeiro (acesso
+        # direto) e o max_row só é calculado quando ela está vazia, pois arquivos antigos
+        # têm a linha 1 vazia e o cabeçalho na linha 2
+        if ws.cell(row=1, column=1).value is None and ws.max_row == 1:
+            ws.append(list(COLUMNS.keys()))
+
+        # Coleta CEPs já salvos para evitar duplicatas, em uma única varredura da coluna 'A'
+        saved_ceps = {
+            value
+            for (value,) in ws.iter_rows(min_row=2, min_col=1, max_col=1, values_only=True)
+            if value is not None
+        }
     else:
-        wb = Workbook()
-        ws = wb.active
-    if ws.max_row == 1 and ws.cell(row=1, column=1).value is None:
+        # Arquivo novo: grava todas as linhas em uma única passada no modo somente escrita
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet()
         ws.append(list(COLUMNS.keys()))
-
-    # Coleta CEPs já salvos para evitar duplicatas
-    saved_ceps = {
-        ws.cell(row=i, column=1).value 
-        for i in range(2, ws.max_row + 1)
-    }
+        saved_ceps = set()
 
     for address in addresses:
         cep = address.get("cep")
@@ -143,7 +242,11 @@ def save_address_in_excel(addresses: list[dict[str, str]], file: Path) -> None:
             continue
 
         # Salva apenas as colunas definidas em COLUMNS
-        ws.append([address.get(key, "N/A") for key in COLUMNS.values()])
+        try:
+            ws.append(COLUMN_GETTER(address))
+        except KeyError:
+            # Resposta incompleta: preenche as colunas ausentes com "N/A"
+            ws.append([address.get(key, "N/A") for key in COLUMN_KEYS])
         saved_ceps.add(cep)
         print(f"CEP {cep} salvo.")
 
@@ -159,13 +262,14 @@ def add_ceps_in_file(file: Path, ceps: list[str]) -> None:
         file (str): Caminho do arquivo Excel a ser criado.
         ceps (list[str]): Lista de CEPs a serem inseridos.
     """
-    wb = Workbook()
-    ws = wb.active
-    ws["A1"] = "CEPS"
+    # Modo somente escrita: as linhas são serializadas direto, sem manter células em memória
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(("CEPS",))
 
     # Insere cada CEP a partir da segunda linha
-    for i, cep in enumerate(ceps, start=2):
-        ws[f"A{i}"] = cep
+    for cep in ceps:
+        ws.append((cep,))
 
     wb.save(file)
 
@@ -177,10 +281,6 @@ if __name__ == "__main__":
     add_ceps_in_file(FILE_CEPS, ceps_test)
 
     # Lê, consulta e salva os endereços
-    addresses = []
-    for cep in return_ceps_in_file(FILE_CEPS):
-        result = get_address_cep(cep)
-        if result:
-            addresses.append(result)
+    addresses = asyncio.run(fetch_addresses(return_ceps_in_file(FILE_CEPS)))
 
     save_address_in_excel(addresses, FILE_ADDRESS)
\ No newline at end of file
@@ -4,19 +4,35 @@ dos resultados em uma nova planilha Excel.
 
 Fluxo:
     1. Lê os CEPs da aba 'CEP' do arquivo Excel.
-    2. Consulta cada CEP na API ViaCEP.
+    2. Consulta os CEPs de forma concorrente na API ViaCEP.
     3. Salva os endereços encontrados na aba 'Dados' do mesmo arquivo.
 
 
 """
 
 import pandas as pd
+import lxml  # noqa: F401 — openpyxl usa o lxml (C) para ler/gravar o XML quando instalado
 from pathlib import Path
-import http.client
-import json
+import asyncio
+import aiohttp
 import re
+import shelve
+import time
+try:
+    # orjson é opcional: decodifica os bytes da resposta direto e é mais rápido que o json padrão
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
 DIR = Path(__file__).parent
 FILE = DIR / 'CEP.xlsx'
+VIACEP_URL = "https://viacep.com.br/ws/{cep}/json"
+# Máximo de requisições simultâneas à API ViaCEP
+MAX_CONCURRENT_REQUESTS = 10
+# Respostas da ViaCEP guardadas em disco; depois de 30 dias o CEP é consultado de novo
+CACHE_FILE = DIR / ".api_cache"
+CACHE_TTL = 30 * 24 * 60 * 60
+# Expressão regular compilada uma única vez no carregamento do módulo
+CEP_REGEX = re.compile(r'\d{8}')
 COLUMNS = ["cep","logradouro", "bairro", "localidade", "uf"]
 
 
@@ -32,17 +48,23 @@ def validate_cep(cep) -> bool:
         bool: True Caso CEP for válido. False Caso CEP ser inválido.
 
     """
-    return bool(re.fullmatch(r'\d{8}', cep))
+    return bool(CEP_REGEX.fullmatch(cep))
 
 
 
 
-def get_address_cep(cep: str) -> dict[str,str] | None:
+async def get_address_cep(
+    cep: str,
+    session: aiohttp.ClientSession,
+    semaphore: asyncio.Semaphore,
+) -> dict[str,str] | None:
     """
     Consulta a API ViaCEP e retorna os dados de endereço do CEP informado.
 
     Args:
         cep (str): CEP a ser consultado, somente numeros (ex: 01001000)
+        session (aiohttp.ClientSession): Sessão HTTP compartilhada entre as consultas.
+        semaphore (asyncio.Semaphore): Limita o número de requisições simultâneas.
 
     Returns:
         dict[str,str]: Dicionário com os dados do endereço se encontrado.
@@ -52,18 +74,16 @@ def get_address_cep(cep: str) -> dict[str,str] | None:
     if not validate_cep(cep):
         print(f"CEP {cep} inválido (deve ter 8 dígitos).")
         return {}
-    
-    connection = http.client.HTTPSConnection("viacep.com.br")
+
     try:
-        # Envia requisição GET para a API ViaCEP com o CEP informado
-        connection.request("GET", f"/ws/{cep}/json")
-        response = connection.getresponse()
-        # Retorna None se a API não responder com  status 200 OK
-        if response.status != 200:
-            print(f"CEP {cep}: status HTTP inesperado ({response.status})")
-            return None
-        # Decodifica a resposta JSON em UTF-8
-        address = json.loads(response.read().decode("utf-8"))
+        async with semaphore:
+            # Envia requisição GET para a API ViaCEP com o CEP informado
+            async with session.get(VIACEP_URL.format(cep=cep)) as response:
+                # Retorna None se a API não responder com  status 200 OK
+                if response.status != 200:
+                    print(f"CEP {cep}: status HTTP inesperado ({response.status})")
+                    return None
+                address = json_loads(await response.read())
 
         if "erro" in address:
             print(f"CEP {cep} não encontrado.")
@@ -71,38 +91,74 @@ def get_address_cep(cep: str) -> dict[str,str] | None:
         return address 
     except Exception as e:
         print(f"Aconteceu um erro durante a conexão: {e}")
-        connection.close()
         return None
-    finally:
-        # Garante o fechamento da conexão independente do resultado.
-        connection.close()
-        
 
-if __name__ =='__main__':
 
-    # Lê os CEPs da aba 'CEP', ignorando células vazias
-    sheet = pd.read_excel(FILE, sheet_name="CEP")
-    ceps = sheet['CEP'].dropna()
-    
-    # Carrega CEPs já salvos para evitar requisiçoes desnecessárias.
-    try:
-        sheet_dados = pd.read_excel(FILE, sheet_name='Dados')
-        ceps_salvos = set(sheet_dados['cep'].astype(str).str.replace("-","", regex=False).tolist())
-    except Exception:
-        sheet_dados = pd.DataFrame()
-        ceps_salvos = set()
+async def fetch_addresses(ceps: list[str]) -> list[dict[str,str] | None]:
+    """
+    Consulta todos os CEPs de forma concorrente, reaproveitando a mesma sessão HTTP.
+    Respostas guardadas há menos de 30 dias são reaproveitadas do cache.
+
+    Args:
+        ceps (list[str]): Lista de CEPs a serem consultados, somente numeros.
 
+    Returns:
+        list[dict[str,str] | None]: Resultado de cada consulta, na mesma ordem dos CEPs.
+    """
+    with shelve.open(str(CACHE_FILE)) as cache:
+        now = time.time()
+        addresses = {}
+        for cep in ceps:
+            entry = cache.get(cep)
+            addresses[cep] = entry["data"] if entry and now - entry["saved_at"] < CACHE_TTL else None
+        pending = [cep for cep, address in addresses.items() if address is None]
+
+        if pending:
+            semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+            connector = aiohttp.TCPConnector(limit=20, ttl_dns_cache=300)
+
+            async with aiohttp.ClientSession(connector=connector) as session:
+                results = await asyncio.gather(
+                    *(get_address_cep(cep, session, semaphore) for cep in pending)
+                )
+
+            for cep, address in zip(pending, results):
+                addresses[cep] = address
+                if address:
+                    cache[cep] = {"saved_at": now, "data": address}
 
-    # Filtra apenas CEPs ainda não consultados
-    ceps_novos = [c for c in ceps if str(c).replace("-", "") not in ceps_salvos]
+    return [addresses[cep] for cep in ceps]
+
+
+if __name__ =='__main__':
+
+    # Abre o arquivo uma única vez e lê as duas abas do mesmo handle
+    with pd.ExcelFile(FILE, engine="openpyxl") as xls:
+        # Lê os CEPs da aba 'CEP', ignorando células vazias
+        sheet = xls.parse("CEP")
+        ceps = sheet['CEP'].dropna()
+        
+        # Carrega CEPs já salvos para evitar requisiçoes desnecessárias.
+        try:
+            sheet_dados = xls.parse('Dados')
+            ceps_salvos = pd.Index(sheet_dados['cep'].astype(str).str.replace("-","", regex=False))
+        except Exception:
+            sheet_dados = pd.DataFrame()
+            ceps_salvos = pd.Index([], dtype=str)
+
+
+    # Filtra apenas CEPs ainda não consultados (operações vetorizadas do pandas)
+    ceps_normalizados = ceps.astype(str).str.replace("-", "", regex=False)
+    mask = ~ceps_normalizados.isin(ceps_salvos)
+    ceps_novos = ceps[mask].tolist()
     print(f"{len(ceps_novos)} CEP(s) novo(s) para consultar.")
 
-    print(f"CEPs já salvos: {ceps_salvos}")
+    print(f"CEPs já salvos: {set(ceps_salvos)}")
     print(f"CEPs novos para consultar: {ceps_novos}")
     rows = []
-    # Consulta cada CEP na API e acumula os resultados válidos.
-    for cep in ceps_novos:
-        address = get_address_cep(str(cep).replace("-", ""))
+    # Consulta os CEPs de forma concorrente e acumula os resultados válidos.
+    addresses = asyncio.run(fetch_addresses(ceps_normalizados[mask].tolist()))
+    for cep, address in zip(ceps_novos, addresses):
 
         if address:
             rows.append({
@@ -117,9 +173,8 @@ if __name__ =='__main__':
         df_novo = pd.DataFrame(rows)
         df_final = pd.concat([sheet_dados, df_novo], ignore_index=True)
      
-        # Salva todos os endereços encontrados na aba 'Dados' do Excel
-        results = pd.DataFrame(rows)
-        with pd.ExcelWriter(FILE,engine="openpyxl",mode='a',if_sheet_exists='replace') as writer:
+        # Substitui apenas a aba 'Dados'; as demais abas e a formatação do arquivo são mantidas
+        with pd.ExcelWriter(FILE, engine="openpyxl", mode='a', if_sheet_exists='replace') as writer:
             df_final.to_excel(writer, sheet_name='Dados', index=False)
         
         
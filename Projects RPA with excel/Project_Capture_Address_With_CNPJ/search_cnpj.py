@@ -3,7 +3,7 @@ Módulo para validação e consulta de CNPJs via API ReceitaWS.
 
 Fluxo:
     1. Valida o CNPJ informado via regex e dígitos verificadores.
-    2. Consulta os dados da empresa na API ReceitaWS.
+    2. Consulta os dados das empresas na API ReceitaWS, respeitando o limite de requisições.
     3. Retorna as informações em formato dicionário.
     4. Salva as informações da empresa em uma Planilha Excel de forma automatizada.
 
@@ -12,16 +12,54 @@ Limites da API ReceitaWS:
     - Timeout padrão retorna status 504.
 """
 
-import http.client
+import asyncio
 import json
 import re
+import shelve
+import time
+import aiohttp
+import numpy as np
 import pandas as pd
+from aiolimiter import AsyncLimiter
+from collections.abc import AsyncIterator
+import lxml  # noqa: F401 — openpyxl usa o lxml (C) para ler/gravar o XML quando instalado
+from openpyxl import Workbook
 from pathlib import Path
-import time
-RECEITAWS_HOST = "www.receitaws.com.br"
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    # Módulo privado do openpyxl, usado só nas anotações de tipo
+    from openpyxl.worksheet._write_only import WriteOnlyWorksheet
+
+try:
+    # orjson é opcional: decodifica os bytes da resposta direto e é mais rápido que o json padrão
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+RECEITAWS_URL = "https://www.receitaws.com.br/v1/cnpj/{cnpj}"
+
+# Limite do plano gratuito da ReceitaWS: 3 requisições a cada 60 segundos.
+# O AsyncLimiter permite rajadas do tamanho da capacidade, então o limite é aplicado
+# como 1 requisição a cada 20 segundos (mesma média, sem estourar a janela de 1 minuto)
+RATE_LIMIT_REQUESTS = 1
+RATE_LIMIT_PERIOD = 20
 DIR = Path(__file__).parent
 FILE = DIR / "data_cnpj.xlsx"
 
+# Empresas já consultadas ficam em disco por 30 dias, poupando o limite de requisições
+CACHE_FILE = DIR / ".api_cache"
+CACHE_TTL = 30 * 24 * 60 * 60
+
+# Expressões regulares compiladas uma única vez no carregamento do módulo
+CNPJ_REGEX = re.compile(r'^(\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2}|\d{14})$')
+NON_DIGIT_REGEX = re.compile(r'\D')
+
+# Pesos oficiais da Receita Federal para o 1º e o 2º dígito verificador
+CNPJ_WEIGHTS_FIRST = (5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2)
+CNPJ_WEIGHTS_SECOND = (6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2)
+
+DATA_COLUMNS = ["CNPJ", "nome", "situacao", "atividade_principal", "cep", "email"]
+
 
 def validator_cnpj(cnpj: str) -> bool:
     """
@@ -38,32 +76,28 @@ def validator_cnpj(cnpj: str) -> bool:
         2. Rejeita CNPJs com todos os dígitos iguais (ex: 11111111111111).
         3. Verifica os dois dígitos verificadores pelo algoritmo oficial da Receita Federal.
     """
-    pattern = r'^(\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2}|\d{14})$'
-
-    if not re.fullmatch(pattern, cnpj):
+    if not CNPJ_REGEX.fullmatch(cnpj):
         return False
 
-    cnpj_numbers = re.sub(r'\D', '', cnpj)
+    cnpj_numbers = NON_DIGIT_REGEX.sub('', cnpj)
 
     if cnpj_numbers == cnpj_numbers[0] * 14:
         return False
 
-    def calc_digit(cnpj_partial: str) -> str:
+    def calc_digit(digits_partial: list[int], weights: tuple[int, ...]) -> int:
         """
         Calcula um dígito verificador pelo algoritmo oficial da Receita Federal.
         """
-        weights = [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]
-        total = sum(
-            int(d) * weights[i + len(weights) - len(cnpj_partial)]
-            for i, d in enumerate(cnpj_partial)
-        )
-        rest = total % 11
-        return '0' if rest < 2 else str(11 - rest)
+        rest = sum(d * w for d, w in zip(digits_partial, weights)) % 11
+        return 0 if rest < 2 else 11 - rest
 
-    first_digit = calc_digit(cnpj_numbers[:12])
-    second_digit = calc_digit(cnpj_numbers[:12] + first_digit)
+    # Converte os caracteres em inteiros uma única vez ('0' = 48 na tabela ASCII)
+    digits = [ord(c) - 48 for c in cnpj_numbers]
 
-    return cnpj_numbers[-2:] == first_digit + second_digit
+    first_digit = calc_digit(digits[:12], CNPJ_WEIGHTS_FIRST)
+    second_digit = calc_digit(digits[:13], CNPJ_WEIGHTS_SECOND)
+
+    return digits[12] == first_digit and digits[13] == second_digit
 
 
 def cnpj_format(cnpj: str) -> str:
@@ -76,9 +110,42 @@ def cnpj_format(cnpj: str) -> str:
     Returns:
         str: CNPJ contendo apenas números (ex: '00000000000000').
     """
-    return re.sub(r'\D', '', cnpj)
+    return NON_DIGIT_REGEX.sub('', cnpj)
+
+
+
+
+def filter_valid_cnpjs(cnpjs: list[str]) -> list[str]:
+    """
+    Valida uma lista de CNPJs de uma só vez, calculando os dígitos verificadores com NumPy.
 
+    Mesmas regras de 'validator_cnpj', aplicadas a todos os CNPJs em operações vetorizadas.
 
+    Args:
+        cnpjs (list[str]): CNPJs normalizados, somente números.
+
+    Returns:
+        list[str]: Apenas os CNPJs válidos, na ordem original.
+    """
+    candidatos = [c for c in cnpjs if len(c) == 14 and c.isascii() and c.isdigit()]
+    if not candidatos:
+        return []
+
+    # Matriz (N, 14) com os dígitos de cada CNPJ ('0' = 48 na tabela ASCII)
+    digits = np.frombuffer("".join(candidatos).encode("ascii"), dtype=np.uint8).reshape(-1, 14)
+    digits = digits.astype(np.int32) - 48
+
+    first = (digits[:, :12] @ np.array(CNPJ_WEIGHTS_FIRST)) % 11
+    first = np.where(first < 2, 0, 11 - first)
+
+    second = (digits[:, :12] @ np.array(CNPJ_WEIGHTS_SECOND[:12]) + first * CNPJ_WEIGHTS_SECOND[12]) % 11
+    second = np.where(second < 2, 0, 11 - second)
+
+    # Rejeita CNPJs com todos os dígitos iguais (ex: 11111111111111)
+    all_equal = (digits == digits[:, :1]).all(axis=1)
+
+    valid = (first == digits[:, 12]) & (second == digits[:, 13]) & ~all_equal
+    return [cnpj for cnpj, ok in zip(candidatos, valid) if ok]
 
 
 def read_cnpj_in_sheet(file=FILE) -> list[str]:
@@ -89,27 +156,37 @@ def read_cnpj_in_sheet(file=FILE) -> list[str]:
 
 
     try:
-        # Lê os CNPJs da aba de entrada
-        df_cnpj_input = pd.read_excel(file, sheet_name='CNPJS')
+        # Abre o arquivo uma única vez e lê as duas abas do mesmo handle
+        with pd.ExcelFile(file, engine="openpyxl") as xls:
+            # Lê os CNPJs da aba de entrada
+            df_cnpj_input = xls.parse('CNPJS')
 
 
-        try:
-            # Lê os CNPJs consultados
-            df_data = pd.read_excel(file,sheet_name='Dados')
-            cnpjs_consultados = set(df_data['CNPJ'].astype(str).tolist())
-        except Exception:
-            cnpjs_consultados = set()
+            try:
+                # Lê os CNPJs consultados
+                df_data = xls.parse('Dados')
+                cnpjs_consultados = set(df_data['CNPJ'].astype(str).tolist())
+            except Exception:
+                cnpjs_consultados = set()
 
         # Normaliza e filtra apenas CNPJs ainda não consultados
-        cnpjs_pendente = []
+        cnpjs_novos = []
         for cnpj in df_cnpj_input['CNPJ'].dropna():
             cnpj_normalizado = cnpj_format(cnpj)
 
             if cnpj_normalizado in cnpjs_consultados:
                 print(f"CNPJ {cnpj_normalizado} já foi consultado, pulando...")
                 continue
-            cnpjs_pendente.append(cnpj_normalizado)
-            print(f"CNPJ {cnpj_normalizado} adicionado à fila de consulta.")
+            cnpjs_novos.append(cnpj_normalizado)
+
+        # Valida todos os CNPJs de uma vez; apenas os válidos seguem para a API
+        cnpjs_pendente = filter_valid_cnpjs(cnpjs_novos)
+        validos = set(cnpjs_pendente)
+        for cnpj in cnpjs_novos:
+            if cnpj in validos:
+                print(f"CNPJ {cnpj} adicionado à fila de consulta.")
+            else:
+                print(f"CNPJ {cnpj} inválido, pulando...")
         return cnpjs_pendente 
 
 
@@ -121,12 +198,47 @@ def read_cnpj_in_sheet(file=FILE) -> list[str]:
    
 
 
-def get_cnpj_with_httpclient(cnpj: str) -> dict[str, str] | None:
+def read_cached_company(cache: shelve.Shelf, cnpj: str) -> dict[str, str] | None:
+    """
+    Retorna os dados da empresa se o CNPJ foi consultado na ReceitaWS há menos de 30 dias.
+
+    Args:
+        cache (shelve.Shelf): Cache aberto em 'fetch_cnpjs'.
+        cnpj (str): CNPJ sem máscara.
+
+    Returns:
+        dict[str, str] | None: Dados guardados, ou None se for preciso consultar a API.
+    """
+    entry = cache.get(cnpj)
+    if entry and time.time() - entry["saved_at"] < CACHE_TTL:
+        return entry["data"]
+    return None
+
+
+def cache_company(cache: shelve.Shelf, cnpj: str, data: dict[str, str]) -> None:
+    """
+    Guarda os dados da empresa retornados pela ReceitaWS para as próximas execuções.
+
+    Args:
+        cache (shelve.Shelf): Cache aberto em 'fetch_cnpjs'.
+        cnpj (str): CNPJ sem máscara que foi consultado.
+        data (dict[str, str]): Resposta da API.
+    """
+    cache[cnpj] = {"saved_at": time.time(), "data": data}
+
+
+async def get_cnpj_with_httpclient(
+    cnpj: str,
+    session: aiohttp.ClientSession,
+    limiter: AsyncLimiter,
+) -> dict[str, str] | None:
     """
     Consulta os dados de uma empresa na API ReceitaWS a partir do CNPJ.
 
     Args:
         cnpj (str): CNPJ a ser consultado (com ou sem máscara).
+        session (aiohttp.ClientSession): Sessão HTTP compartilhada entre as consultas.
+        limiter (AsyncLimiter): Controla a taxa de requisições para respeitar o limite da API.
 
     Returns:
         dict[str, str]: Dicionário com as informações da empresa.
@@ -142,26 +254,27 @@ def get_cnpj_with_httpclient(cnpj: str) -> dict[str, str] | None:
         return None
 
     cnpj = cnpj_format(cnpj)
-    connection = http.client.HTTPSConnection(RECEITAWS_HOST)
     try:
-        connection.request("GET", f"/v1/cnpj/{cnpj}")
-        response = connection.getresponse()
-        status = response.status
+        # Aguarda uma vaga no limite de requisições antes de consultar
+        async with limiter:
+            print(f"Consultando CNPJ {cnpj}...")
+            async with session.get(RECEITAWS_URL.format(cnpj=cnpj)) as response:
+                status = response.status
 
-        if status == 429:
-            print("Limite de requisições atingido. Máximo: 3 por minuto.")
-            return None
+                if status == 429:
+                    print("Limite de requisições atingido. Máximo: 3 por minuto.")
+                    return None
 
-        if status == 504:
-            print("Timeout — tempo máximo de requisição excedido.")
-            return None
+                if status == 504:
+                    print("Timeout — tempo máximo de requisição excedido.")
+                    return None
 
-        if status == 200:
-            print("Requisição bem-sucedida (200 OK).")
-            return json.loads(response.read().decode("utf-8"))
+                if status == 200:
+                    print(f"CNPJ {cnpj}: requisição bem-sucedida (200 OK).")
+                    return json_loads(await response.read())
 
-        print(f"Status inesperado recebido: {status}")
-        return None
+                print(f"Status inesperado recebido: {status}")
+                return None
 
     except json.JSONDecodeError as e:
         print(f"Erro na decodificação do JSON: {e}")
@@ -171,70 +284,138 @@ def get_cnpj_with_httpclient(cnpj: str) -> dict[str, str] | None:
         print(f"Erro na requisição com a API: {e}")
         return None
 
-    finally:
-        connection.close()
 
+async def fetch_cnpjs(cnpjs: list[str]) -> AsyncIterator[dict[str, str]]:
+    """
+    Consulta todos os CNPJs de forma concorrente, respeitando o limite da API ReceitaWS.
+    CNPJs já consultados recentemente são lidos do cache em disco e não consomem o limite.
 
-def save_data_in_sheet(data: dict[str, str], file: Path = FILE) -> None:
+    Args:
+        cnpjs (list[str]): Lista de CNPJs a serem consultados.
+
+    Yields:
+        dict[str, str]: Dados de cada empresa encontrada, conforme as respostas chegam.
     """
-    Salva dados de CNPJ em uma planilha Excel, evitando duplicatas.
+    with shelve.open(str(CACHE_FILE)) as cache:
+        pending = []
+        for cnpj in dict.fromkeys(map(cnpj_format, cnpjs)):
+            data = read_cached_company(cache, cnpj)
+            if data:
+                yield data
+            else:
+                pending.append(cnpj)
+
+        if not pending:
+            return
+
+        limiter = AsyncLimiter(RATE_LIMIT_REQUESTS, RATE_LIMIT_PERIOD)
+
+        async with aiohttp.ClientSession() as session:
+
+            async def fetch_with_cnpj(cnpj: str) -> tuple[str, dict[str, str] | None]:
+                # Devolve o CNPJ consultado junto com a resposta, pois o as_completed
+                # não preserva a ordem e respostas de erro não trazem a chave 'cnpj'
+                return cnpj, await get_cnpj_with_httpclient(cnpj, session, limiter)
+
+            tasks = [fetch_with_cnpj(cnpj) for cnpj in pending]
+
+            for next_result in asyncio.as_completed(tasks):
+                cnpj, data = await next_result
+                if data:
+                    # Respostas de erro da API (status 200 com "status": "ERROR") não são guardadas
+                    if data.get("status") != "ERROR":
+                        cache_company(cache, cnpj, data)
+                    yield data
+
+
+def open_data_sink(file: Path = FILE) -> tuple[Workbook, "WriteOnlyWorksheet"]:
+    """
+    Cria o workbook de saída em modo somente escrita, já contendo as linhas existentes do arquivo.
 
     Args:
-        data (dict[str, str]): Dicionário com os dados da empresa retornados pela API.
-        file (Path): Caminho do arquivo Excel de destino.
+        file (Path): Caminho do arquivo Excel com os dados já salvos.
 
     Abas criadas:
         - 'Dados': Informações completas de todas as empresas consultadas.
         - 'CNPJS': Lista de CNPJs já salvos para evitar duplicatas.
 
     Returns:
-        None
+        tuple: Workbook a ser salvo ao final e a aba 'Dados' onde os novos CNPJs serão anexados.
     """
-    # Carrega ou cria o arquivo Excel
+    df_data = pd.DataFrame(columns=DATA_COLUMNS)
+    df_cnpjs = pd.DataFrame(columns=['CNPJS'])
+
     if file.exists():
-        try:
-            df_data = pd.read_excel(file, sheet_name="Dados")
-        except Exception:
-            df_data = pd.DataFrame(columns=["CNPJ", "nome", "situacao", "atividade_principal", "cep", "email"])
+        # Lê as duas abas do mesmo handle
+        with pd.ExcelFile(file, engine="openpyxl") as xls:
+            try:
+                df_data = xls.parse("Dados")
+            except Exception:
+                pass
 
-        try:
-            df_cnpjs = pd.read_excel(file, sheet_name="CNPJS")
-        except Exception:
-            df_cnpjs = pd.DataFrame(columns=['CNPJS'])
+            try:
+                df_cnpjs = xls.parse("CNPJS")
+            except Exception:
+                pass
 
-    else:
-        df_data = pd.DataFrame(columns=["CNPJ", "nome", "situacao", "atividade_principal", "cep", "email"])
-        df_cnpjs = pd.DataFrame(columns=['CNPJS'])
+    wb = Workbook(write_only=True)
+    ws_data = wb.create_sheet("Dados")
+    ws_cnpjs = wb.create_sheet("CNPJS")
+
+    # Copia as linhas existentes; células vazias (NaN) são gravadas em branco
+    for ws, df in ((ws_data, df_data), (ws_cnpjs, df_cnpjs)):
+        ws.append(list(df.columns))
+        for row in df.astype(object).where(df.notna(), None).itertuples(index=False):
+            ws.append(row)
 
-    # Normaliza o CNPJ e verifica se já foi consultado
-    cnpj = cnpj_format(data.get("cnpj", ""))
+    return wb, ws_data
 
 
+def save_data_in_sheet(data: dict[str, str], ws: "WriteOnlyWorksheet") -> None:
+    """
+    Anexa os dados de um CNPJ à aba 'Dados' aberta por 'open_data_sink'.
+
+    Args:
+        data (dict[str, str]): Dicionário com os dados da empresa retornados pela API.
+        ws (WriteOnlyWorksheet): Aba 'Dados' do workbook em modo somente escrita.
+
+    Returns:
+        None
+    """
     # Extrai atividade principal (é uma lista de dicts)
     atividade = "N/A"
     if data.get("atividade_principal"):
         atividade = data["atividade_principal"][0].get("text", "N/A") #type: ignore
 
-    # Adiciona nova linha com os dados da empresa
-    nova_linha = pd.DataFrame([{
-        "CNPJ": data.get("cnpj", "N/A"),
-        "nome": data.get("nome", "N/A"),
-        "situacao": data.get("situacao", "N/A"),
-        "atividade_principal": atividade,
-        "cep": data.get("cep", "N/A"),
-        "email": data.get("email", "N/A"),
-    }])
+    # Mesma ordem das colunas em DATA_COLUMNS
+    ws.append((
+        data.get("cnpj", "N/A"),
+        data.get("nome", "N/A"),
+        data.get("situacao", "N/A"),
+        atividade,
+        data.get("cep", "N/A"),
+        data.get("email", "N/A"),
+    ))
 
+    print(f"CNPJ {cnpj_format(data.get('cnpj', ''))} salvo com sucesso.")
 
-    # Concatena com os dados existentes
-    df_data_final = pd.concat([df_data, nova_linha], ignore_index=True)
 
-    # Salva mantendo a aba CNPJ intact.
-    with pd.ExcelWriter(file, engine="openpyxl") as writer:
-        df_data_final.to_excel(writer, sheet_name="Dados", index=False)
-        df_cnpjs.to_excel(writer, sheet_name='CNPJS', index=False)
+async def stream_cnpjs_to_sheet(cnpjs: list[str], ws: "WriteOnlyWorksheet") -> int:
+    """
+    Consulta os CNPJs e anexa cada resultado à planilha assim que a resposta chega.
+
+    Args:
+        cnpjs (list[str]): Lista de CNPJs a serem consultados.
+        ws (WriteOnlyWorksheet): Aba 'Dados' do workbook em modo somente escrita.
 
-    print(f"CNPJ {cnpj} salvo com sucesso.")
+    Returns:
+        int: Quantidade de CNPJs salvos.
+    """
+    saved = 0
+    async for data in fetch_cnpjs(cnpjs):
+        save_data_in_sheet(data, ws)
+        saved += 1
+    return saved
 
 
 if __name__ == "__main__":
@@ -246,13 +427,8 @@ if __name__ == "__main__":
     else:
         print(f"\n{len(cnpj_pendente)} CNPJ(s) para consultar.\n")
 
-        for i, cnpj in enumerate(cnpj_pendente, 1):
-            print(f"[{i}/{len(cnpj_pendente)}] Consultando CNPJ {cnpj}...\n")
-            result = get_cnpj_with_httpclient(cnpj)
-
-            if result:
-                save_data_in_sheet(result)
-                # Aguarda 20s entre requisições para respeitar o limite da API.
-                if i < len(cnpj_pendente):
-                    print("Aguardando 20 segundos antes da próxima consulta...\n")
-                    time.sleep(20)
\ No newline at end of file
+        # As consultas são disparadas juntas e liberadas no ritmo máximo permitido pela API;
+        # cada resultado é anexado à planilha conforme chega e o arquivo é salvo uma única vez
+        wb, ws = open_data_sink(FILE)
+        if asyncio.run(stream_cnpjs_to_sheet(cnpj_pendente, ws)):
+            wb.save(FILE)
\ No newline at end of file
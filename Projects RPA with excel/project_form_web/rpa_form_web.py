@@ -9,15 +9,19 @@ Fluxo:
 """
 
 # Importando biblioteca selenium para a automatização do fluxo.
-# Pyautogui para dar um intervalo entre processos.
+# As esperas são feitas com WebDriverWait, sem pausas fixas entre os campos.
 from selenium import webdriver as driver
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By 
 from selenium.webdriver.common.keys import Keys
-from openpyxl import load_workbook
-import time 
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from python_calamine import CalamineWorkbook
 from pathlib import Path
+from typing import NamedTuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import sys
+import threading
 
 
 
@@ -26,6 +30,12 @@ DIR = Path(__file__).parent
 FILE = DIR / 'DadosFormulario.xlsx'
 FORM_URL = "https://pt.surveymonkey.com/r/WLXYDX2"
 
+# Valores usados para completar linhas com menos colunas que o formulário.
+EMPTY_ROW = ("",) * 5
+
+# Quantidade de navegadores preenchendo formulários ao mesmo tempo (um por thread).
+MAX_WORKERS = 4
+
 
 FORM_FIELDS = {
     "nome": ("name", "166517069"),
@@ -43,7 +53,19 @@ FORM_FIELDS = {
 
 
 
-def  wait_for_element(locator_type: str,value: str, browser: driver.Edge, timeout: int = 10):
+class Linha(NamedTuple):
+    """
+    Registro com os dados de uma linha da planilha usados no formulário.
+    """
+    nome: str
+    email: str
+    telefone: str
+    genero: str
+    sobre: str
+
+
+def  wait_for_element(locator_type: str,value: str, browser: driver.Edge, timeout: int = 10,
+                      condition=EC.presence_of_element_located):
     """
     Aguarda até que um elemento esteja presente na página.
 
@@ -52,6 +74,7 @@ def  wait_for_element(locator_type: str,value: str, browser: driver.Edge, timeou
         locator_type (str): Tipo do localizador ('name', 'id', 'xpath', etc.).
         locator_value (str): Valor do localizador (ID, nome, XPath, etc.).
         timeout (int): Tempo máximo de espera em segundos (padrão: 10).
+        condition: Condição do expected_conditions a aguardar (padrão: presença do elemento).
 
     Returns:
         WebElement: Elemento encontrado na página.
@@ -72,85 +95,82 @@ def  wait_for_element(locator_type: str,value: str, browser: driver.Edge, timeou
     if not locator:
         raise ValueError(f"Tipo de localizador inválido: {locator_type}")    
         
-    return  wait.until(EC.presence_of_element_located((locator, value)))
+    return  wait.until(condition((locator, value)))
 
 
 
-def preencher_planilha(linha_dados: dict) -> bool:
+def preencher_planilha(linha_dados: Linha, browser: driver.Edge) -> bool:
     """
     Preenche e submete o formulário web com os dados fornecidos.
 
     Args:
-        linha_dados (dict): Dicionário contendo os dados da linha:
-            - 'nome' (str): Nome completo
-            - 'email' (str): Email
-            - 'telefone' (str): Telefone
-            - 'genero' (str): 'Masculino' ou 'Feminino'
-            - 'sobre' (str): Descrição sobre a pessoa
+        browser (webdriver.Edge): Instância do navegador reaproveitada entre as linhas.
+        linha_dados (Linha): Registro contendo os dados da linha:
+            - nome (str): Nome completo
+            - email (str): Email
+            - telefone (str): Telefone
+            - genero (str): 'Masculino' ou 'Feminino'
+            - sobre (str): Descrição sobre a pessoa
 
     Returns:
         bool: True se o formulário foi preenchido e enviado com sucesso, False caso contrário.
     """
 
-    browser = None
-
     try:
-        # Inicializa o navegador
-        browser = driver.Edge()
+        # Recarrega o formulário na mesma sessão do navegador
         browser.get(FORM_URL)
-        print(f"Processando: {linha_dados['nome']}")
 
 
 
         # Preenche campo nome
         campo_nome = wait_for_element(*FORM_FIELDS["nome"],browser)
-        campo_nome.send_keys(linha_dados["nome"])
-        time.sleep(1)
+        campo_nome.send_keys(linha_dados.nome)
 
 
         # Preenche campo email
         campo_email = wait_for_element(*FORM_FIELDS["email"],browser)
-        campo_email.send_keys(linha_dados['email'])
-        time.sleep(1)
+        campo_email.send_keys(linha_dados.email)
 
 
         # Preenche campo telefone
         campo_telefone = wait_for_element(*FORM_FIELDS['telefone'], browser)
-        campo_telefone.send_keys(linha_dados['telefone'])
-        time.sleep(1)
+        campo_telefone.send_keys(linha_dados.telefone)
 
         # Seleciona gênero (radio button)
-        if linha_dados['genero'].lower() == 'masculino':
-            radio = wait_for_element(*FORM_FIELDS['genero_masculino'],browser)
+        if linha_dados.genero.lower() == 'masculino':
+            radio = wait_for_element(*FORM_FIELDS['genero_masculino'],browser, condition=EC.element_to_be_clickable)
         else:
-            radio = wait_for_element(*FORM_FIELDS['genero_feminino'],browser)
+            radio = wait_for_element(*FORM_FIELDS['genero_feminino'],browser, condition=EC.element_to_be_clickable)
 
         radio.click()
-        time.sleep(1)
 
         # Preenche campo sobre
         campo_sobre = wait_for_element(*FORM_FIELDS['sobre'],browser)
-        campo_sobre.send_keys(linha_dados['sobre'])
-        time.sleep(1)
+        campo_sobre.send_keys(linha_dados.sobre)
 
 
-        # Envia o formulário
-        botao_enviar = wait_for_element(*FORM_FIELDS["submit"],browser)
+        # Envia o formulário e aguarda a navegação para a página de confirmação
+        botao_enviar = wait_for_element(*FORM_FIELDS["submit"],browser, condition=EC.element_to_be_clickable)
+        url_formulario = browser.current_url
         botao_enviar.click()
-        time.sleep(2)
+        WebDriverWait(browser, 10).until(EC.url_changes(url_formulario))
 
 
-        print(f"✓ Formulário enviado para {linha_dados['nome']}")
         return True
-    except TimeoutError as e:
-        print(f"✗ Timeout ao processar {linha_dados.get('nome', 'N/A')}: {e}")
+    except TimeoutException as e:
+        # Só as falhas são impressas (no stderr); os sucessos entram apenas no resumo final
+        print(f"✗ Timeout ao processar {linha_dados.nome}: {e}", file=sys.stderr)
         return False
     except Exception as e:
-        print(f"✗ Erro ao processar {linha_dados.get('nome', 'N/A')}: {e}")
+        print(f"✗ Erro ao processar {linha_dados.nome}: {e}", file=sys.stderr)
         return False
     finally:
-        if browser:
-            browser.quit()
+        # Limpa o estado da sessão para a próxima linha começar do zero;
+        # uma falha aqui (ex: sessão encerrada) não pode substituir o retorno acima
+        try:
+            browser.delete_all_cookies()
+        except WebDriverException as e:
+            print(f"✗ Erro ao limpar os cookies após {linha_dados.nome}: {e}", file=sys.stderr)
         
 
 
@@ -158,38 +178,104 @@ def preencher_planilha(linha_dados: dict) -> bool:
 
 
 
-def carregar_dados_da_planilha(file: Path) -> list[dict]:
+def carregar_dados_da_planilha(file: Path) -> list[Linha]:
     """
-    Carrega os dados da planilha Excel e retorna como lista de dicionários.
+    Carrega os dados da planilha Excel e retorna como lista de registros.
 
     Args:
         file (Path): Caminho do arquivo Excel contendo os dados.
 
     Returns:
-        list[dict]: Lista de dicionários, cada um representando uma linha da planilha.
+        list[Linha]: Lista de registros, cada um representando uma linha da planilha.
     """
-    wb = load_workbook(file)
-    ws = wb['Dados']
+    # O calamine (Rust) lê a aba e já devolve valores Python tipados, linha a linha
+    wb = CalamineWorkbook.from_path(str(file))
+    rows = wb.get_sheet_by_name('Dados').iter_rows()
 
+    # Ignora o cabeçalho
+    next(rows, None)
 
     dados = []
 
-    for linha in range(2, ws.max_row + 1):
-        linha_dados = {
-            'nome': ws[f'A{linha}'].value or "",
-            "email": ws[f'B{linha}'].value or "",
-            "telefone": ws[f'C{linha}'].value or "",
-            "genero": ws[f"D{linha}"].value or "",
-            "sobre": ws[f'E{linha}'].value or "",
-        }
-
-        if not linha_dados["nome"]:
+    for row in rows:
+        # Linhas sem nome (ex: linhas em branco no fim da aba) são puladas antes de montar o registro
+        if not row or not row[0]:
             continue
 
-        dados.append(linha_dados)
+        # Linhas com menos de 5 colunas são completadas e células vazias viram ""
+        nome, email, telefone, genero, sobre = (value or "" for value in (*row, *EMPTY_ROW)[:5])
+
+        # Números inteiros do Excel (ex: telefone) chegam como float; guarda como texto sem o ".0"
+        if isinstance(telefone, float) and telefone.is_integer():
+            telefone = str(int(telefone))
+        else:
+            telefone = str(telefone)
+
+        dados.append(Linha(nome, email, telefone, genero, sobre))
     return dados 
 
 
+def preencher_em_paralelo(dados: list[Linha], max_workers: int = MAX_WORKERS) -> tuple[int, int]:
+    """
+    Preenche os formulários de várias linhas em paralelo, com um navegador por thread.
+
+    Cada thread abre seu próprio navegador na primeira linha que processa e o reaproveita
+    nas seguintes; todos são fechados ao final.
+
+    Args:
+        dados (list[Linha]): Registros carregados da planilha.
+        max_workers (int): Quantidade máxima de navegadores abertos ao mesmo tempo.
+
+    Returns:
+        tuple[int, int]: Quantidade de formulários enviados com sucesso e de falhas.
+    """
+    local = threading.local()
+    browsers = []
+    browsers_lock = threading.Lock()
+
+    def preencher_na_thread(linha_dados: Linha) -> bool:
+        browser = getattr(local, "browser", None)
+        if browser is None:
+            browser = driver.Edge()
+            local.browser = browser
+            with browsers_lock:
+                browsers.append(browser)
+        return preencher_planilha(linha_dados, browser)
+
+    total = len(dados)
+    sucesso = 0
+    falhas = 0
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # Guarda a posição de cada registro, pois o as_completed devolve na ordem de término
+            futures = {
+                executor.submit(preencher_na_thread, linha_dados): (i, linha_dados)
+                for i, linha_dados in enumerate(dados, 1)
+            }
+
+            # Os contadores só são atualizados aqui, na thread principal
+            for future in as_completed(futures):
+                i, linha_dados = futures[future]
+                try:
+                    ok = future.result()
+                except Exception as e:
+                    print(f"✗ Erro ao processar {linha_dados.nome}: {e}", file=sys.stderr)
+                    ok = False
+
+                # O progresso só é impresso para as linhas que falharam
+                if ok:
+                    sucesso += 1
+                else:
+                    falhas += 1
+                    print(f"[{i}/{total}] FALHA: {linha_dados.nome}", file=sys.stderr)
+    finally:
+        for browser in browsers:
+            browser.quit()
+
+    return sucesso, falhas
+
+
 if __name__ == "__main__":
     print("=== Iniciando preenchimento automático de formulários ===\n")
 
@@ -211,16 +297,8 @@ if __name__ == "__main__":
     print(f"Total de registros a processar: {total}\n")
 
 
-    sucesso = 0
-    falhas = 0
-
-    for i, linha_dados  in enumerate(dados, 1):
-        print(f"[{i}/{total}] ", end="")
-        if preencher_planilha(linha_dados ):
-            sucesso += 1
-        else:
-            falhas += 1
-            print()
+    # Processa as linhas em paralelo, cada thread com seu próprio navegador
+    sucesso, falhas = preencher_em_paralelo(dados)
 
       # Resumo final
     print("=== Processamento concluído ===")
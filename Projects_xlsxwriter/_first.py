@@ -6,6 +6,7 @@ Modulo utilizado para criar planilhas do Excel utilizando a biblioteca externa x
 #Bibliotecas importadadas.
 import  xlsxwriter as xl
 from xlsxwriter import format
+from functools import lru_cache
 # Biblioteca OS para abrir arquivo após o workbook ser fechado. No meu caso não tenho Excel instalado, 
 # então não o usei.
 # import os 
@@ -20,7 +21,11 @@ from pathlib import Path
 # Caminho do arquivo a ser criado.
 DIR = Path(__file__).parent # C:\xxx\xxx\xxx\xxx\Projetos_RPA\Projects_xlsxwriter
 FILE = DIR / 'dados.xlsx' #C:\xxx\xxx\xxx\xxx\Projetos_RPA\Projects_xlsxwriter\dados.xlsx
-wb = xl.Workbook(FILE)
+
+# constant_memory grava cada linha em disco assim que a próxima começa, mantendo a memória
+# constante mesmo em planilhas grandes. Com ele ativo, as células devem ser escritas em
+# ordem de linha (como é feito abaixo). use_zip64 permite arquivos com mais de 4GB.
+wb = xl.Workbook(FILE, {'constant_memory': True, 'use_zip64': True})
 
 # Nome da sheet ativa que será usada
 sheet = wb.add_worksheet('Dados')
@@ -29,6 +34,8 @@ sheet = wb.add_worksheet('Dados')
 
 
 # Funções para formatar celulas.
+# O lru_cache devolve o mesmo Format para a mesma cor, evitando formatos duplicados.
+@lru_cache(maxsize=None)
 def set_fot_color(color_font: str) -> format.Format:
     """
     Função para mudar a cor de uma fonte.
@@ -37,11 +44,10 @@ def set_fot_color(color_font: str) -> format.Format:
     Returns:
         out: Referencia a uma modificação de um objeto .xlsx
     """
-    standart = wb.add_format()
-    standart.set_font_color(color_font)
-    return standart
+    return wb.add_format({'font_color': color_font})
 
 
+@lru_cache(maxsize=None)
 def set_backgroud_color(color_font: str) -> format.Format:    
     """
     Função para mudar a cor de fundo de uma celula.
@@ -50,19 +56,19 @@ def set_backgroud_color(color_font: str) -> format.Format:
     Returns:
         out: Referencia a uma modificação de um objeto .xlsx
     """
-    standart = wb.add_format()
-    standart.set_bg_color(color_font)
-    return standart
+    return wb.add_format({'bg_color': color_font})
+
 
 
 
 
+# Formatos criados uma única vez e reaproveitados em todas as células.
+YELLOW_BG = set_backgroud_color('yellow')
+BLUE_FONT = set_fot_color('blue')
 
-sheet.write("A1",'Nome',set_backgroud_color('yellow'))
-sheet.write("B1",'IDADE', set_backgroud_color('yellow'))
-sheet.write("C1", 'Origem', set_backgroud_color('yellow'))
-sheet.write("A2",'Augusto',set_fot_color('blue'))
-sheet.write("B2","12",set_fot_color('blue'))
+# Escreve cada linha de uma vez; a idade vai como número (write_number).
+sheet.write_row("A1", ['Nome', 'IDADE', 'Origem'], YELLOW_BG)
+sheet.write_row("A2", ['Augusto', 12], BLUE_FONT)
 
 wb.close()
 
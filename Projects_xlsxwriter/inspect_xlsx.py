@@ -1,18 +1,43 @@
 import zipfile
-import xml.etree.ElementTree as ET
 import os
+try:
+    from lxml import etree as ET
+    HAS_LXML = True
+except ImportError:
+    import xml.etree.ElementTree as ET
+    HAS_LXML = False
 from pathlib import Path
 
+# Células inspecionadas na primeira aba
+WANTED_CELLS = ('A1', 'B1', 'C1', 'A2', 'B2')
+WANTED = frozenset(WANTED_CELLS)
+# Última linha que contém células inspecionadas; a leitura para ao terminá-la
+LAST_WANTED_ROW = 2
 
-def strip_ns(tag):
-    return tag.split('}', 1)[-1] if '}' in tag else tag
+# Tags em notação Clark ({namespace}nome), comparadas direto com elem.tag
+NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+C_TAG = f'{{{NS}}}c'
+ROW_TAG = f'{{{NS}}}row'
+PF_TAG = f'{{{NS}}}patternFill'
+FG_TAG = f'{{{NS}}}fgColor'
+BG_TAG = f'{{{NS}}}bgColor'
+# Prefixo usado nas consultas de caminho (find/iterfind) sobre o styles.xml
+NSMAP = {'s': NS}
 
 
-def find_child_by_localname(parent, localname):
-    for ch in parent:
-        if strip_ns(ch.tag) == localname:
-            return ch
-    return None
+def iter_sheet_elements(sheet_file):
+    """
+    Percorre os elementos <c> e <row> de uma aba em streaming.
+    Args:
+        sheet_file: Arquivo (ou stream) com o XML da aba.
+    Returns:
+        out: Iterador de pares (evento, elemento) do iterparse.
+    """
+    if HAS_LXML:
+        # O lxml filtra as tags em C; os demais elementos nem chegam ao Python
+        return ET.iterparse(sheet_file, events=('end',), tag=(C_TAG, ROW_TAG))
+    # O xml.etree não aceita o filtro tag=; a checagem fica no laço do chamador
+    return ET.iterparse(sheet_file, events=('end',))
 
 
 def parse_xlsx(path):
@@ -22,52 +47,55 @@ def parse_xlsx(path):
         return
 
     with zipfile.ZipFile(path, 'r') as z:
-        # Ler sheet1
-        sheet_xml = z.read('xl/worksheets/sheet1.xml')
-        sheet_root = ET.fromstring(sheet_xml)
-
+        # Ler sheet1 em streaming, guardando apenas as células de interesse
         cells = {}
-        for c in sheet_root.findall('.//'):
-            if strip_ns(c.tag) == 'c':
-                r = c.attrib.get('r')
-                s = c.attrib.get('s')
-                cells[r] = s
+        with z.open('xl/worksheets/sheet1.xml') as sheet_file:
+            for _, elem in iter_sheet_elements(sheet_file):
+                if elem.tag == C_TAG:
+                    r = elem.attrib.get('r')
+                    if r in WANTED:
+                        cells[r] = elem.attrib.get('s')
+                        if len(cells) == len(WANTED):
+                            break
+                    elem.clear()
+                elif elem.tag == ROW_TAG:
+                    # Nenhuma célula inspecionada aparece depois desta linha
+                    row = elem.attrib.get('r')
+                    if row is not None and int(row) >= LAST_WANTED_ROW:
+                        break
+                    # Libera as células da linha já processada
+                    elem.clear()
 
-        # Ler styles
+        # Ler styles apenas se alguma das células inspecionadas tiver índice de estilo
         styles = {}
-        if 'xl/styles.xml' in z.namelist():
-            styles_xml = z.read('xl/styles.xml')
-            styles_root = ET.fromstring(styles_xml)
+        if any(s is not None for s in cells.values()) and 'xl/styles.xml' in z.namelist():
+            # Lê direto do membro do zip, descompactando sob demanda enquanto faz o parse
+            with z.open('xl/styles.xml') as styles_file:
+                styles_root = ET.parse(styles_file).getroot()
 
+            # procurar patternFill/fgColor de cada fill, na ordem do fillId
+            # (o bgColor só é usado quando o fill não tem fgColor)
             fills = []
-            fills_el = find_child_by_localname(styles_root, 'fills')
-            if fills_el is not None:
-                for f in fills_el:
-                    # procurar patternFill/fgColor
-                    pattern = None
-                    for p in f:
-                        if strip_ns(p.tag) == 'patternFill':
-                            fg = None
-                            for item in p:
-                                if strip_ns(item.tag) in ('fgColor', 'bgColor'):
-                                    fg = item.attrib
-                            pattern = (strip_ns(p.tag), fg)
-                    fills.append(pattern)
+            for f in styles_root.iterfind('s:fills/s:fill', NSMAP):
+                pf = f.find(PF_TAG)
+                if pf is None:
+                    # Mantém a posição para que o índice continue batendo com o fillId
+                    fills.append(None)
+                    continue
+                color = pf.find(FG_TAG)
+                if color is None:
+                    color = pf.find(BG_TAG)
+                fills.append(('patternFill', dict(color.attrib) if color is not None else None))
 
             # map xfs -> fillId
-            xfs = []
-            cellxfs = find_child_by_localname(styles_root, 'cellXfs')
-            if cellxfs is not None:
-                for xf in cellxfs:
-                    fillId = xf.attrib.get('fillId')
-                    xfs.append(fillId)
+            xfs = [xf.get('fillId') for xf in styles_root.iterfind('s:cellXfs/s:xf', NSMAP)]
 
             styles['fills'] = fills
             styles['xfs'] = xfs
 
         # Mostrar resultados para algumas células
         print('Inspeção de:', path)
-        for coord in ('A1', 'B1', 'C1', 'A2', 'B2'):
+        for coord in WANTED_CELLS:
             s = cells.get(coord)
             if s is None:
                 print(f'{coord}: sem valor ou sem estilo')